@@ -1,8 +1,14 @@
 import time
 import os
 import random
+import queue
+import threading
+import functools
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 
 import cv2
+import numpy as np
 import mediapipe as mp
 import pygame
 import imageio
@@ -10,23 +16,47 @@ import imageio
 # Motion tuning
 MOVEMENT_THRESHOLD = 0.0025        # smaller value = more sensitive to quick moves
 DIRECTION_CHANGE_TARGET = 4        # number of direction changes needed to trigger 67 mode
+DIRECTION_NAMES = {-1: "up", 0: "none", 1: "down"}  # directions are ints, names only for display
 NO_MOTION_TIMEOUT = 0.5            # seconds with no strong motion before reset
 HAND_LOST_GRACE = 1.5              # seconds we tolerate hands briefly disappearing
 
+# Main window
+DETECTOR_WINDOW_NAME = "67 Detector"
+
+# Hand tracking
+INFERENCE_WIDTH = 480              # frames are downscaled to this width before hand tracking
+HAND_MODEL_FILE = "hand_landmarker.task"  # optional Tasks model, enables the GPU hand tracker
+WRIST = 0                          # index of the wrist landmark (HandLandmark.WRIST)
+USE_OPENCL = True                  # run full-frame resize and flash on the GPU via OpenCL, if available
+IDLE_STRIDE = 3                    # while idle, only track hands on every Nth frame
+
 # Visual tuning
 FLASH_INTERVAL_FRAMES = 1          # check for flash every frame during 67 mode
 FLASH_INTENSITY_BASE = 0.3         # base flash brightness (lighter)
 FLASH_INTENSITY_SCALE = 3.0        # extra brightness from motion
+HUD_FONT = cv2.FONT_HERSHEY_SIMPLEX
+HUD_THICKNESS = 2
 
 # Audio
 MUSIC_FILE = "six_seven_theme.mp3"
 
-# Popup settings (OpenCV windows)
+# Popup settings (all popups are drawn into one fullscreen OpenCV window)
 POPUP_FOLDER = "popups"            # folder containing your gif files
 POPUP_DELAY_SECONDS = 5.0          # seconds after music starts in 67 mode before popups start
-POPUP_SHUFFLE_INTERVAL = 0.1      # seconds between "close one and reopen on top" events
-POPUP_NUM_WINDOWS = 20              # how many popup windows at once (matches your seven gifs)
-POPUP_WIDTH = 800                  # width to resize popup gif frames
+POPUP_SHUFFLE_INTERVAL = 0.1      # seconds between "move one popup and bring it to the top" events
+POPUP_NUM_WINDOWS = 20              # how many popups are drawn into the popup window at once
+POPUP_WIDTH = 400                  # width to resize popup gif frames (20 overlapping popups gain nothing from more)
+POPUP_WINDOW_NAME = "67POP"        # single fullscreen window all popups are drawn into
+POPUP_EXTENSIONS = {"gif", "png", "jpg", "jpeg"}
+POPUP_MAX_FRAMES = 30              # cap frames per gif to avoid huge memory usage
+POPUP_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "67detector")
+
+# The main loop keeps time as integer nanoseconds from time.monotonic_ns()
+NS_PER_SECOND = 1_000_000_000
+NO_MOTION_TIMEOUT_NS = int(NO_MOTION_TIMEOUT * NS_PER_SECOND)
+HAND_LOST_GRACE_NS = int(HAND_LOST_GRACE * NS_PER_SECOND)
+POPUP_DELAY_NS = int(POPUP_DELAY_SECONDS * NS_PER_SECOND)
+POPUP_SHUFFLE_INTERVAL_NS = int(POPUP_SHUFFLE_INTERVAL * NS_PER_SECOND)
 
 
 def get_screen_size():
@@ -45,27 +75,208 @@ def get_screen_size():
 
 
 
-def get_average_wrist_height(results):
+def create_hand_tracker():
+    """
+    Return a function that maps an RGB frame to a list of hand landmark lists.
+
+    If HAND_MODEL_FILE is next to this script we use the MediaPipe Tasks
+    HandLandmarker on the GPU delegate (falling back to CPU where the GPU
+    delegate is not available, e.g. Windows). Otherwise we use the legacy
+    mp.solutions.hands tracker, which is CPU only.
+    """
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    model_path = os.path.join(script_dir, HAND_MODEL_FILE)
+
+    if os.path.exists(model_path):
+        try:
+            return create_tasks_hand_tracker(model_path)
+        except Exception as e:
+            print("[hands] error creating Tasks hand tracker, using legacy:", e)
+    else:
+        print(f"[hands] {HAND_MODEL_FILE} not found, using legacy hand tracker")
+
+    hands = mp.solutions.hands.Hands(
+        static_image_mode=False,
+        max_num_hands=2,
+        min_detection_confidence=0.25,
+        min_tracking_confidence=0.25,
+    )
+
+    def process(rgb):
+        results = hands.process(rgb)
+        return list(results.multi_hand_landmarks or [])
+
+    return process
+
+
+def create_tasks_hand_tracker(model_path):
+    """Build a HandLandmarker tracker, preferring the GPU delegate."""
+    from mediapipe.framework.formats import landmark_pb2
+
+    BaseOptions = mp.tasks.BaseOptions
+    HandLandmarker = mp.tasks.vision.HandLandmarker
+    HandLandmarkerOptions = mp.tasks.vision.HandLandmarkerOptions
+    RunningMode = mp.tasks.vision.RunningMode
+
+    landmarker = None
+    for delegate in (BaseOptions.Delegate.GPU, BaseOptions.Delegate.CPU):
+        options = HandLandmarkerOptions(
+            base_options=BaseOptions(model_asset_path=model_path, delegate=delegate),
+            running_mode=RunningMode.VIDEO,
+            num_hands=2,
+            min_hand_detection_confidence=0.25,
+            min_hand_presence_confidence=0.25,
+            min_tracking_confidence=0.25,
+        )
+        try:
+            landmarker = HandLandmarker.create_from_options(options)
+            print(f"[hands] Tasks hand tracker using {delegate.name} delegate")
+            break
+        except Exception as e:
+            print(f"[hands] {delegate.name} delegate unavailable:", e)
+    if landmarker is None:
+        raise RuntimeError("no usable delegate for HandLandmarker")
+
+    last_timestamp = [0]
+
+    def process(rgb):
+        # VIDEO mode needs strictly increasing timestamps in ms
+        timestamp = max(time.monotonic_ns() // 1_000_000, last_timestamp[0] + 1)
+        last_timestamp[0] = timestamp
+        image = mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb)
+        result = landmarker.detect_for_video(image, timestamp)
+
+        # Convert to the same landmark protos the legacy tracker returns,
+        # so drawing_utils and the wrist height code work unchanged.
+        hand_landmarks_list = []
+        for hand in result.hand_landmarks:
+            proto = landmark_pb2.NormalizedLandmarkList()
+            proto.landmark.extend(
+                landmark_pb2.NormalizedLandmark(x=lm.x, y=lm.y, z=lm.z) for lm in hand
+            )
+            hand_landmarks_list.append(proto)
+        return hand_landmarks_list
+
+    return process
+
+
+def put_latest(q, item):
+    """
+    Put item into a 1-slot queue, dropping whatever was still waiting there.
+    Returns the dropped item, or None.
+    """
+    dropped = None
+    try:
+        dropped = q.get_nowait()
+    except queue.Empty:
+        pass
+    q.put_nowait(item)
+    return dropped
+
+
+def capture_loop(cap, frame_queue, stop_event):
+    """
+    Read camera frames on a background thread, keeping only the newest one.
+    Always ends by queueing None so the main loop stops instead of waiting.
+    """
+    try:
+        while not stop_event.is_set():
+            ret, frame = cap.read()
+            if not ret:
+                print("[core] camera read failed")
+                return
+            put_latest(frame_queue, frame)
+    except Exception as e:
+        print("[core] error in capture thread:", e)
+    finally:
+        put_latest(frame_queue, None)
+
+
+def inference_loop(track_hands, rgb_queue, free_rgb_queue, latest, latest_lock):
+    """
+    Run hand tracking on a background thread.
+
+    Consumes (frame_id, rgb) items from rgb_queue and publishes the newest
+    landmarks into latest. Each rgb buffer goes back to free_rgb_queue once
+    tracked so the main thread can reuse it. A None item stops the thread.
+    If tracking raises, latest["failed"] is set so the main loop can exit
+    rather than keep drawing stale landmarks.
+    """
+    while True:
+        item = rgb_queue.get()
+        if item is None:
+            return
+        frame_id, rgb = item
+        try:
+            hand_landmarks_list = track_hands(rgb)
+        except Exception as e:
+            print("[hands] error in hand tracking thread:", e)
+            with latest_lock:
+                latest["failed"] = True
+            return
+        free_rgb_queue.put(rgb)
+        with latest_lock:
+            latest["frame_id"] = frame_id
+            latest["hands"] = hand_landmarks_list
+
+
+def get_average_wrist_height(hand_landmarks_list):
     """Return average wrist y in normalized coordinates, or None if no hands."""
-    if not results or not results.multi_hand_landmarks:
+    if not hand_landmarks_list:
         return None
 
-    mp_hands = mp.solutions.hands
-    ys = []
-    for hand_landmarks in results.multi_hand_landmarks:
-        wrist = hand_landmarks.landmark[mp_hands.HandLandmark.WRIST]
-        ys.append(wrist.y)
-    if not ys:
-        return None
-    return sum(ys) / len(ys)
+    ys = np.fromiter(
+        (hand_landmarks.landmark[WRIST].y for hand_landmarks in hand_landmarks_list),
+        dtype=np.float32,
+        count=len(hand_landmarks_list),
+    )
+    return float(ys.mean())
 
 
 def apply_flash_effect(frame, intensity=0.5):
-    """Overlay a white flash on the frame."""
-    overlay = frame.copy()
-    h, w, _ = frame.shape
-    cv2.rectangle(overlay, (0, 0), (w, h), (255, 255, 255), -1)
-    return cv2.addWeighted(overlay, intensity, frame, 1 - intensity, 0)
+    """
+    Overlay a white flash on the frame (in place, single pass).
+    frame may be a cv2.UMat, in which case the blend runs through OpenCL.
+    """
+    # frame * (1 - intensity) + 255 * intensity, same as blending with a white overlay
+    return cv2.convertScaleAbs(frame, dst=frame, alpha=1.0 - intensity, beta=255.0 * intensity)
+
+
+@functools.lru_cache(maxsize=256)
+def render_text(text, scale, color):
+    """
+    Rasterize one HUD line into a small BGR sprite, once per distinct text.
+
+    Returns (sprite, mask, ascent): mask marks the text pixels and ascent is
+    how far the sprite's top edge sits above the text baseline.
+    """
+    (w, h), baseline = cv2.getTextSize(text, HUD_FONT, scale, HUD_THICKNESS)
+    pad = HUD_THICKNESS
+    sprite = np.zeros((h + baseline + 2 * pad, w + 2 * pad, 3), np.uint8)
+    cv2.putText(sprite, text, (pad, h + pad), HUD_FONT, scale, color, HUD_THICKNESS, cv2.LINE_AA)
+    mask = sprite.any(axis=2)
+    return sprite, mask, h + pad
+
+
+def draw_text(frame, text, org, scale, color):
+    """Draw text like cv2.putText (org is the baseline start) using a cached sprite."""
+    sprite, mask, ascent = render_text(text, scale, color)
+    top = org[1] - ascent
+    left = org[0] - HUD_THICKNESS
+    sh, sw = mask.shape
+    fh, fw = frame.shape[:2]
+
+    y0, x0 = max(top, 0), max(left, 0)
+    y1, x1 = min(top + sh, fh), min(left + sw, fw)
+    if y0 >= y1 or x0 >= x1:
+        return
+
+    sy, sx = y0 - top, x0 - left
+    np.copyto(
+        frame[y0:y1, x0:x1],
+        sprite[sy:sy + y1 - y0, sx:sx + x1 - x0],
+        where=mask[sy:sy + y1 - y0, sx:sx + x1 - x0, None],
+    )
 
 
 def load_music():
@@ -97,13 +308,92 @@ def stop_music():
         print("[audio] Music stopped")
 
 
+def decode_popup(path):
+    """
+    Decode one gif or image into an (N, H, W, 3) BGR array resized to
+    POPUP_WIDTH, or None if it has no frames.
+    """
+    frames = imageio.mimread(path)
+    if not frames:
+        print(f"[popup] no frames in {path}")
+        return None
+
+    # Subsample frames if there are too many
+    if len(frames) > POPUP_MAX_FRAMES:
+        step = max(1, len(frames) // POPUP_MAX_FRAMES)
+        frames = frames[::step]
+
+    cv_frames = []
+    for f in frames:
+        img = f
+        if img.ndim == 3:
+            if img.shape[2] == 4:
+                img = cv2.cvtColor(img, cv2.COLOR_RGBA2BGR)
+            else:
+                img = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
+        else:
+            img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+        h, w = img.shape[:2]
+        scale = POPUP_WIDTH / float(w)
+        new_size = (POPUP_WIDTH, int(h * scale))
+        img_resized = cv2.resize(img, new_size, interpolation=cv2.INTER_AREA)
+        cv_frames.append(img_resized)
+
+    return np.stack(cv_frames, axis=0)
+
+
+def load_popup_sequence(path, mtime):
+    """
+    Load one popup sequence, going through the on-disk cache.
+
+    Decoded and resized frames are saved as .npy under POPUP_CACHE_DIR,
+    keyed by path, mtime and resize settings. Later runs memory-map the
+    cached array instead of decoding the gif again. Returns None if the
+    file has no frames or cannot be loaded.
+    """
+    key_src = f"{os.path.abspath(path)}|{mtime}|{POPUP_WIDTH}|{POPUP_MAX_FRAMES}"
+    key = hashlib.blake2b(key_src.encode()).hexdigest()[:16]
+    cache_path = os.path.join(POPUP_CACHE_DIR, f"{key}.npy")
+
+    if os.path.exists(cache_path):
+        try:
+            seq = np.load(cache_path, mmap_mode="r")
+            print(f"[popup] loaded {len(seq)} frames from cache for {path}")
+            return seq
+        except Exception as e:
+            print(f"[popup] bad cache file {cache_path}, decoding again:", e)
+
+    try:
+        seq = decode_popup(path)
+    except Exception as e:
+        print(f"[popup] error loading {path}:", e)
+        return None
+    if seq is None:
+        return None
+    print(f"[popup] loaded {len(seq)} frames from {path}")
+
+    try:
+        os.makedirs(POPUP_CACHE_DIR, exist_ok=True)
+        # Write to a temp file first so a crash never leaves a half-written cache
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.ascontiguousarray(seq, dtype=np.uint8))
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        print(f"[popup] could not write cache {cache_path}:", e)
+
+    return seq
+
+
 def load_popup_gifs():
     """
     Load all gifs and images from POPUP_FOLDER.
 
-    Each entry in returned list is a list of OpenCV BGR frames
-    resized to POPUP_WIDTH while keeping aspect ratio.
-    To avoid using too much memory, we cap frames per gif.
+    Each entry in returned list is one contiguous (N, H, W, 3) uint8
+    array of OpenCV BGR frames resized to POPUP_WIDTH while keeping
+    aspect ratio, so seq[idx] is a cheap view into a single buffer.
+    To avoid using too much memory, we cap frames per gif, and cached
+    sequences are memory-mapped from disk (see load_popup_sequence).
     """
     script_dir = os.path.dirname(os.path.abspath(__file__))
     folder = os.path.join(script_dir, POPUP_FOLDER)
@@ -112,49 +402,21 @@ def load_popup_gifs():
         print(f"[popup] folder not found: {folder}")
         return []
 
+    # scandir gives us the mtime for the cache key without extra stat calls
     files = []
-    for name in os.listdir(folder):
-        lower = name.lower()
-        if lower.endswith(".gif") or lower.endswith(".png") or lower.endswith(".jpg") or lower.endswith(".jpeg"):
-            files.append(os.path.join(folder, name))
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.rpartition(".")[2].lower() in POPUP_EXTENSIONS:
+                files.append((entry.path, entry.stat().st_mtime))
 
     if not files:
         print("[popup] no images found in popups folder")
         return []
 
-    MAX_FRAMES_PER_GIF = 30  # cap frames per gif to avoid huge memory usage
-    all_sequences = []
-    for path in files:
-        try:
-            frames = imageio.mimread(path)
-            if not frames:
-                print(f"[popup] no frames in {path}")
-                continue
-
-            # Subsample frames if there are too many
-            if len(frames) > MAX_FRAMES_PER_GIF:
-                step = max(1, len(frames) // MAX_FRAMES_PER_GIF)
-                frames = frames[::step]
-
-            cv_frames = []
-            for f in frames:
-                img = f
-                if img.ndim == 3:
-                    if img.shape[2] == 4:
-                        img = cv2.cvtColor(img, cv2.COLOR_RGBA2BGR)
-                    else:
-                        img = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
-                h, w = img.shape[:2]
-                scale = POPUP_WIDTH / float(w)
-                new_size = (POPUP_WIDTH, int(h * scale))
-                img_resized = cv2.resize(img, new_size, interpolation=cv2.INTER_AREA)
-                cv_frames.append(img_resized)
-
-            if cv_frames:
-                all_sequences.append(cv_frames)
-                print(f"[popup] loaded {len(cv_frames)} frames from {path}")
-        except Exception as e:
-            print(f"[popup] error loading {path}:", e)
+    # Decoding is mostly spent in imageio and OpenCV, which release the GIL
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        sequences = list(executor.map(lambda f: load_popup_sequence(*f), files))
+    all_sequences = [seq for seq in sequences if seq is not None]
 
     print(f"[popup] total gif sequences loaded: {len(all_sequences)}")
     return all_sequences
@@ -163,8 +425,11 @@ def load_popup_gifs():
 
 def create_popup_windows(popup_gifs, screen_size):
     """
-    Create POPUP_NUM_WINDOWS OpenCV windows showing random gifs
-    at random positions across the entire screen.
+    Open the fullscreen popup window and place POPUP_NUM_WINDOWS random
+    gifs at random positions across the entire screen.
+
+    All popups are composited into one canvas (see draw_popup_windows),
+    so there is a single OpenCV window instead of one per gif.
     """
     if not popup_gifs:
         return []
@@ -172,18 +437,18 @@ def create_popup_windows(popup_gifs, screen_size):
     screen_w, screen_h = screen_size
     windows = []
 
+    cv2.namedWindow(POPUP_WINDOW_NAME, cv2.WINDOW_NORMAL)
+    cv2.setWindowProperty(POPUP_WINDOW_NAME, cv2.WND_PROP_FULLSCREEN, cv2.WINDOW_FULLSCREEN)
+    try:
+        cv2.setWindowProperty(POPUP_WINDOW_NAME, cv2.WND_PROP_TOPMOST, 1)
+    except Exception:
+        # Some platforms or backends may not support this, so we just ignore it
+        pass
+
     num_windows = POPUP_NUM_WINDOWS
 
     for i in range(num_windows):
         seq = random.choice(popup_gifs)
-        name = f"67POP_{i}"
-
-        cv2.namedWindow(name, cv2.WINDOW_NORMAL)
-        try:
-            cv2.setWindowProperty(name, cv2.WND_PROP_TOPMOST, 1)
-        except Exception:
-            # Some platforms or backends may not support this, so we just ignore it
-            pass
 
         sample = seq[0]
         h_img, w_img = sample.shape[:2]
@@ -193,27 +458,43 @@ def create_popup_windows(popup_gifs, screen_size):
         x = random.randint(0, max_x) if max_x > 0 else 0
         y = random.randint(0, max_y) if max_y > 0 else 0
 
-        cv2.moveWindow(name, x, y)
-
         windows.append({
-            "name": name,
             "frames": seq,
             "idx": random.randint(0, len(seq) - 1),
             "x": x,
             "y": y,
         })
 
-    print(f"[popup] created {len(windows)} popup windows at random positions")
+    print(f"[popup] created {len(windows)} popups at random positions")
     return windows
 
 
+def draw_popup_windows(canvas, popup_windows):
+    """
+    Composite the current frame of every popup into canvas and advance
+    each gif. Later entries are drawn on top.
+    """
+    canvas_h, canvas_w = canvas.shape[:2]
+    canvas.fill(0)
+    for w_info in popup_windows:
+        frames_seq = w_info["frames"]
+        if len(frames_seq) == 0:
+            continue
+        idx = w_info["idx"]
+        frame_img = frames_seq[idx]
+        x, y = w_info["x"], w_info["y"]
+        h = min(frame_img.shape[0], canvas_h - y)
+        w = min(frame_img.shape[1], canvas_w - x)
+        if h > 0 and w > 0:
+            canvas[y:y + h, x:x + w] = frame_img[:h, :w]
+        w_info["idx"] = (idx + 1) % len(frames_seq)
 
 
 def destroy_popup_windows(popup_windows):
-    """Close all popup windows and clear list."""
-    for w in popup_windows:
+    """Close the popup window and clear list."""
+    if popup_windows:
         try:
-            cv2.destroyWindow(w["name"])
+            cv2.destroyWindow(POPUP_WINDOW_NAME)
         except Exception:
             pass
     popup_windows.clear()
@@ -222,8 +503,8 @@ def destroy_popup_windows(popup_windows):
 
 def shuffle_one_popup_window(popup_windows, popup_gifs, screen_size):
     """
-    Close one existing popup window and reopen it with a random gif
-    at a new random position on the full screen.
+    Move one existing popup to a new random position on the full screen,
+    give it a random gif and bring it to the top of the stack.
     """
     if not popup_windows or not popup_gifs:
         return popup_windows
@@ -231,23 +512,8 @@ def shuffle_one_popup_window(popup_windows, popup_gifs, screen_size):
     screen_w, screen_h = screen_size
 
     idx = random.randrange(len(popup_windows))
-    w_info = popup_windows[idx]
-    name = w_info["name"]
-
-    try:
-        cv2.destroyWindow(name)
-    except Exception:
-        pass
 
     seq = random.choice(popup_gifs)
-    cv2.namedWindow(name, cv2.WINDOW_NORMAL)
-    try:
-        cv2.setWindowProperty(name, cv2.WND_PROP_TOPMOST, 1)
-    except Exception:
-        # Some platforms or backends may not support this, so we just ignore it
-        pass
-
-
     sample = seq[0]
     h_img, w_img = sample.shape[:2]
     max_x = max(0, screen_w - w_img)
@@ -255,17 +521,16 @@ def shuffle_one_popup_window(popup_windows, popup_gifs, screen_size):
     x = random.randint(0, max_x) if max_x > 0 else 0
     y = random.randint(0, max_y) if max_y > 0 else 0
 
-    cv2.moveWindow(name, x, y)
-
-    popup_windows[idx] = {
-        "name": name,
+    # Drawn last means drawn on top
+    del popup_windows[idx]
+    popup_windows.append({
         "frames": seq,
         "idx": 0,
         "x": x,
         "y": y,
-    }
+    })
 
-    print(f"[popup] reshuffled window {name} to {x},{y}")
+    print(f"[popup] reshuffled popup {idx} to {x},{y}")
     return popup_windows
 
 
@@ -284,31 +549,68 @@ def main():
 
     popup_gifs = load_popup_gifs()
 
+    # OpenCV's transparent API runs UMat operations on an OpenCL device
+    use_opencl = USE_OPENCL and cv2.ocl.haveOpenCL()
+    cv2.ocl.setUseOpenCL(use_opencl)
+    print("[core] OpenCL enabled:", use_opencl)
+
     mp_hands = mp.solutions.hands
-    hands = mp_hands.Hands(
-        static_image_mode=False,
-        max_num_hands=2,
-        min_detection_confidence=0.25,
-        min_tracking_confidence=0.25,
-    )
+    track_hands = create_hand_tracker()
     drawing_utils = mp.solutions.drawing_utils
 
     cap = cv2.VideoCapture(0)
+    # Ask for MJPG before setting the size: at 720p most webcams only reach
+    # full frame rate compressed, and the JPEG decode happens in the backend
+    # instead of a raw YUYV conversion. Cameras without MJPG ignore this.
+    cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"MJPG"))
     cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
     cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+    # Keep the driver from queueing old frames; not every backend honours it
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
     print("[core] camera opened:", cap.isOpened())
     if not cap.isOpened():
         return
 
+    # Capture and hand tracking each run on their own thread so the main
+    # loop only draws. The main loop renders with whatever landmarks are
+    # newest, even if they are a frame behind.
+    stop_event = threading.Event()
+    frame_queue = queue.Queue(maxsize=1)
+    rgb_queue = queue.Queue(maxsize=1)
+    # RGB buffers are recycled between the main and tracking threads. At most
+    # one is queued and one is being tracked, so this never grows past three.
+    free_rgb_queue = queue.Queue()
+    small = None
+    latest = {"frame_id": None, "hands": [], "failed": False}
+    latest_lock = threading.Lock()
+
+    capture_thread = threading.Thread(
+        target=capture_loop, args=(cap, frame_queue, stop_event), daemon=True
+    )
+    inference_thread = threading.Thread(
+        target=inference_loop, args=(track_hands, rgb_queue, free_rgb_queue, latest, latest_lock), daemon=True
+    )
+    capture_thread.start()
+    inference_thread.start()
+
+    # Create the window up front so its visibility can be checked on frame one
+    cv2.namedWindow(DETECTOR_WINDOW_NAME)
+    last_result_id = None
+
+    # Drawing config never changes, so build it once
+    hand_connections = mp_hands.HAND_CONNECTIONS
+    landmark_spec = drawing_utils.DrawingSpec(color=(0, 255, 0), thickness=3, circle_radius=4)
+    connection_spec = drawing_utils.DrawingSpec(color=(0, 0, 255), thickness=2, circle_radius=2)
+
     last_height = None
-    last_direction = None
+    last_direction = 0
     direction_changes = 0
 
-    last_motion_time = time.time()
-    last_seen_hands_time = time.time()
+    last_motion_time = time.monotonic_ns()
+    last_seen_hands_time = last_motion_time
 
     last_dy = 0.0
-    current_direction = "none"
+    current_direction = 0
 
     party_mode = False
     frame_count = 0
@@ -317,60 +619,103 @@ def main():
     music_start_time = None
     popup_active = False
     popup_windows = []
-    popup_last_shuffle_time = 0.0
+    popup_last_shuffle_time = 0
+    popup_canvas = np.zeros((screen_size[1], screen_size[0], 3), np.uint8)
 
     while True:
-        ret, frame = cap.read()
-        if not ret:
+        frame = frame_queue.get()
+        if frame is None:
             break
 
         frame_count += 1
         frame = cv2.flip(frame, 1)
 
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        rgb.flags.writeable = False
-        results = hands.process(rgb)
-        rgb.flags.writeable = True
+        # With no recent motion, tracking every few frames is enough to
+        # notice hands coming back; the last result is reused in between.
+        if hud_visible or frame_count % IDLE_STRIDE == 0:
+            # Landmarks come back normalized, so a smaller copy tracks just as well
+            # and they still draw correctly on the full-res frame.
+            h, w = frame.shape[:2]
+            small_size = (INFERENCE_WIDTH, int(h * INFERENCE_WIDTH / w))
+            if use_opencl:
+                # Only the small result comes back from the GPU
+                small = cv2.resize(
+                    cv2.UMat(frame), small_size, interpolation=cv2.INTER_AREA
+                ).get()
+            else:
+                small = cv2.resize(
+                    frame, small_size, dst=small, interpolation=cv2.INTER_AREA
+                )
+            try:
+                rgb = free_rgb_queue.get_nowait()
+                rgb.flags.writeable = True
+            except queue.Empty:
+                rgb = np.empty_like(small)
+            cv2.cvtColor(small, cv2.COLOR_BGR2RGB, dst=rgb)
+            rgb.flags.writeable = False
+            dropped = put_latest(rgb_queue, (frame_count, rgb))
+            if dropped is not None:
+                free_rgb_queue.put(dropped[1])
+
+        with latest_lock:
+            result_id = latest["frame_id"]
+            hand_landmarks_list = latest["hands"]
+            tracking_failed = latest["failed"]
+        if tracking_failed:
+            print("[core] hand tracking stopped, exiting")
+            break
+        # Motion is only measured between fresh tracking results, a repeated
+        # result would just look like a frame with no movement.
+        new_result = result_id != last_result_id
+        last_result_id = result_id
 
-        num_hands = len(results.multi_hand_landmarks) if results and results.multi_hand_landmarks else 0
-        now = time.time()
+        num_hands = len(hand_landmarks_list)
+        now = time.monotonic_ns()
 
         if num_hands >= 1:
             last_seen_hands_time = now
 
         if num_hands >= 1:
-            avg_height = get_average_wrist_height(results)
+            avg_height = get_average_wrist_height(hand_landmarks_list)
         else:
-            if last_height is not None and (now - last_seen_hands_time) <= HAND_LOST_GRACE:
+            if last_height is not None and (now - last_seen_hands_time) <= HAND_LOST_GRACE_NS:
                 avg_height = last_height
             else:
                 avg_height = None
 
-        if results and results.multi_hand_landmarks:
-            for hand_landmarks in results.multi_hand_landmarks:
+        # Tracking and the motion logic always run, but there is no point
+        # drawing into a window that is minimized or hidden.
+        # 0 means hidden; a negative value means the backend does not support
+        # the property, so keep drawing.
+        visible = cv2.getWindowProperty(DETECTOR_WINDOW_NAME, cv2.WND_PROP_VISIBLE) != 0
+
+        if visible and hand_landmarks_list:
+            for hand_landmarks in hand_landmarks_list:
                 drawing_utils.draw_landmarks(
                     frame,
                     hand_landmarks,
-                    mp_hands.HAND_CONNECTIONS,
-                    drawing_utils.DrawingSpec(color=(0, 255, 0), thickness=3, circle_radius=4),
-                    drawing_utils.DrawingSpec(color=(0, 0, 255), thickness=2, circle_radius=2),
+                    hand_connections,
+                    landmark_spec,
+                    connection_spec,
                 )
 
-        if avg_height is not None:
+        if new_result and avg_height is not None:
             if last_height is not None:
                 dy = avg_height - last_height
                 last_dy = dy
 
-                if abs(dy) > MOVEMENT_THRESHOLD:
-                    current_direction = "up" if dy < 0 else "down"
+                # -1 moving up, 1 moving down, 0 below the threshold
+                new_direction = (dy > MOVEMENT_THRESHOLD) - (dy < -MOVEMENT_THRESHOLD)
+                if new_direction != 0:
+                    current_direction = new_direction
                     hud_visible = True
 
-                    if last_direction is not None and current_direction != last_direction:
+                    if last_direction != 0 and current_direction != last_direction:
                         direction_changes += 1
                         last_motion_time = now
                         print(
                             f"[motion] change {direction_changes} "
-                            f"(dir={current_direction}, dy={dy:.4f})"
+                            f"(dir={DIRECTION_NAMES[current_direction]}, dy={dy:.4f})"
                         )
 
                         if direction_changes >= DIRECTION_CHANGE_TARGET and not party_mode:
@@ -378,7 +723,7 @@ def main():
                             print("[core] 67 mode ON")
                             if music_loaded:
                                 start_music()
-                                music_start_time = time.time()
+                                music_start_time = now
                                 print("[core] music_start_time set")
                             else:
                                 music_start_time = None
@@ -388,9 +733,9 @@ def main():
             last_height = avg_height
 
         idle_time = now - last_motion_time
-        if idle_time > NO_MOTION_TIMEOUT:
+        if idle_time > NO_MOTION_TIMEOUT_NS:
             if party_mode:
-                print(f"[core] 67 mode OFF (idle {idle_time:.2f}s)")
+                print(f"[core] 67 mode OFF (idle {idle_time / NS_PER_SECOND:.2f}s)")
                 party_mode = False
                 if music_loaded:
                     stop_music()
@@ -399,8 +744,8 @@ def main():
                 print("[motion] reset changes due to timeout")
 
             direction_changes = 0
-            last_direction = None
-            current_direction = "none"
+            last_direction = 0
+            current_direction = 0
             last_dy = 0.0
             last_motion_time = now
             hud_visible = False
@@ -409,79 +754,58 @@ def main():
             destroy_popup_windows(popup_windows)
             music_start_time = None
 
-        if hud_visible:
+        if visible and hud_visible:
+            # The first three lines only change with discrete state, so they
+            # come from cached sprites. The dy line changes nearly every frame
+            # and would just churn the cache, so it is drawn live.
             status_text = "67!!!" if party_mode else "Ready"
-            cv2.putText(
+            draw_text(
                 frame,
                 status_text,
                 (10, 30),
-                cv2.FONT_HERSHEY_SIMPLEX,
                 1.0,
                 (0, 255, 0) if party_mode else (0, 255, 255),
-                2,
-                cv2.LINE_AA,
             )
+            draw_text(frame, f"hands: {num_hands}", (10, 60), 0.7, (255, 255, 255))
+            draw_text(frame, f"changes: {direction_changes}", (10, 90), 0.7, (255, 255, 255))
             cv2.putText(
                 frame,
-                f"hands: {num_hands}",
-                (10, 60),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.7,
-                (255, 255, 255),
-                2,
-                cv2.LINE_AA,
-            )
-            cv2.putText(
-                frame,
-                f"changes: {direction_changes}",
-                (10, 90),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.7,
-                (255, 255, 255),
-                2,
-                cv2.LINE_AA,
-            )
-            cv2.putText(
-                frame,
-                f"dir: {current_direction}  dy: {last_dy:+.3f}",
+                f"dir: {DIRECTION_NAMES[current_direction]}  dy: {last_dy:+.3f}",
                 (10, 120),
-                cv2.FONT_HERSHEY_SIMPLEX,
+                HUD_FONT,
                 0.6,
                 (0, 200, 255),
-                2,
+                HUD_THICKNESS,
                 cv2.LINE_AA,
             )
 
-        if party_mode:
+        if visible and party_mode:
             if abs(last_dy) > MOVEMENT_THRESHOLD:
                 intensity = FLASH_INTENSITY_BASE + FLASH_INTENSITY_SCALE * abs(last_dy)
                 intensity = max(0.2, min(0.7, intensity))
                 if frame_count % FLASH_INTERVAL_FRAMES == 0:
-                    frame = apply_flash_effect(frame, intensity=intensity)
+                    # Flash is the last pixel op before imshow, which accepts a UMat
+                    frame = apply_flash_effect(
+                        cv2.UMat(frame) if use_opencl else frame, intensity=intensity
+                    )
 
         if party_mode and music_start_time is not None and popup_gifs:
             music_elapsed = now - music_start_time
-            if music_elapsed >= POPUP_DELAY_SECONDS and not popup_active:
+            if music_elapsed >= POPUP_DELAY_NS and not popup_active:
                 popup_active = True
                 popup_last_shuffle_time = now
                 popup_windows = create_popup_windows(popup_gifs, screen_size)
-                print(f"[popup] popups activated after {music_elapsed:.2f}s")
+                print(f"[popup] popups activated after {music_elapsed / NS_PER_SECOND:.2f}s")
 
         if popup_active and popup_windows:
-            for w_info in popup_windows:
-                frames_seq = w_info["frames"]
-                if not frames_seq:
-                    continue
-                idx = w_info["idx"]
-                frame_img = frames_seq[idx]
-                cv2.imshow(w_info["name"], frame_img)
-                w_info["idx"] = (idx + 1) % len(frames_seq)
-
-            if now - popup_last_shuffle_time >= POPUP_SHUFFLE_INTERVAL:
+            draw_popup_windows(popup_canvas, popup_windows)
+            cv2.imshow(POPUP_WINDOW_NAME, popup_canvas)
+
+            if now - popup_last_shuffle_time >= POPUP_SHUFFLE_INTERVAL_NS:
                 popup_last_shuffle_time = now
                 popup_windows = shuffle_one_popup_window(popup_windows, popup_gifs, screen_size)
 
-        cv2.imshow("67 Detector", frame)
+        cv2.imshow(DETECTOR_WINDOW_NAME, frame)
 
         key = cv2.waitKey(1) & 0xFF
 
@@ -495,7 +819,7 @@ def main():
             else:
                 print("[audio] manual toggle ON (m key)")
                 start_music()
-                music_start_time = time.time()
+                music_start_time = time.monotonic_ns()
                 popup_active = False
                 destroy_popup_windows(popup_windows)
 
@@ -503,6 +827,11 @@ def main():
             print("[core] q pressed, exiting")
             break
 
+    stop_event.set()
+    put_latest(rgb_queue, None)
+    capture_thread.join()
+    inference_thread.join()
+
     cap.release()
     cv2.destroyAllWindows()
     if music_loaded: